@@ -2,7 +2,7 @@ import requests
 import json
 import time
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 
 # Utility function to compute the agent card URL from agent_url
 
@@ -39,6 +39,8 @@ def fetch_agent_card(agent_url: str, timeout: float = 5.0) -> Optional[Dict[str,
 def send_a2a_message(agent_url: str, message: str, attachments: Optional[List[str]] = None, context_id: Optional[str] = None, reset: bool = False, timeout: float = 30.0) -> Dict[str, Any]:
     """
     Send a message to a FastA2A-compatible agent and return the response.
+    Reuse the same context_id across turns and send only the new message: the agent keeps
+    the conversation state for it. reset=True starts the conversation over.
     """
     # Always POST to /a2a endpoint
     if agent_url.endswith('/a2a'):
@@ -61,6 +63,30 @@ def send_a2a_message(agent_url: str, message: str, attachments: Optional[List[st
     return resp.json()
 
 
+def send_a2a_batch(agent_url: str, prompts: List[Any], concurrency: Optional[int] = None, timeout: float = 300.0) -> Iterator[Dict[str, Any]]:
+    """
+    Send many prompts in one request to the agent's /a2a/batch endpoint and yield each result
+    ({"id": ..., "text": ...} or {"id": ..., "error": ...}) as soon as the agent streams it back.
+    prompts may be strings (id = list index) or dicts with "id", "prompt" and optional "context_id".
+    Results arrive in completion order, not submission order.
+    """
+    if agent_url.endswith('/a2a'):
+        post_url = agent_url + '/batch'
+    else:
+        post_url = agent_url.rstrip('/') + '/a2a/batch'
+
+    payload: Dict[str, Any] = {"prompts": prompts}
+    if concurrency:
+        payload["concurrency"] = concurrency
+
+    headers = {"Content-Type": "application/json"}
+    with requests.post(post_url, data=json.dumps(payload), headers=headers, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
 def get_agent_metadata(agent_url: str, timeout: float = 5.0) -> Optional[Dict[str, Any]]:
     """
     Fetch and return the agent card (metadata) for the given agent_url.
@@ -78,4 +104,7 @@ def get_agent_metadata(agent_url: str, timeout: float = 5.0) -> Optional[Dict[st
 #
 # response = send_a2a_message(agent_url, "Hello!", attachments=[], reset=False)
 # print(response)
+#
+# for result in send_a2a_batch(agent_url, [{"id": "t1", "prompt": "Hi"}, {"id": "t2", "prompt": "Bye"}]):
+#     print(result["id"], result.get("text") or result.get("error"))
 
@@ -0,0 +1,358 @@
+"""
+Benchmark suite for the hot paths of human_dolphin_competition_cluster50x50.py.
+
+Times place_dolphin_cluster, random_far_apart_pairs, one reproduction step, one illness step,
+render_grid, validate_pairs and a full end-to-end simulate() run over a sweep of grid sizes and
+population densities, and reports ops/sec and peak memory (tracemalloc, measured in a separate
+pass so it does not distort the timings).
+
+**Density:** 1.0 is the 50x50 scenario's human share (10% of all cells) with the dolphin safe
+zone (30% of the grid edge) completely filled; other values scale both populations linearly.
+
+**Usage:**
+- python3 benchmark_simulation.py run --output benchmark_results.json
+- python3 benchmark_simulation.py compare benchmark_results.json            (re-runs the baseline's sweep)
+- python3 benchmark_simulation.py compare baseline.json current.json --threshold 0.2
+- python3 benchmark_simulation.py startup --against <git-rev>               (cold import / first step, before vs. after)
+
+compare exits with status 1 if any case got slower (ops/sec) or bigger (peak memory) than the
+baseline by more than the threshold, or if a case that ran in the baseline now fails or is
+missing, so it can gate CI.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+import numpy as np
+
+import human_dolphin_competition_cluster50x50 as hd
+
+DEFAULT_GRID_SIZES = [50, 100]
+DEFAULT_DENSITIES = [0.1, 0.25]
+DEFAULT_REPEATS = 5
+DEFAULT_E2E_STEPS = 30
+DEFAULT_THRESHOLD = 0.2
+SAFE_FRACTION = 0.3
+HUMAN_CELL_FRACTION = 0.1
+SEED = 42
+
+
+def scenario(grid_size, density):
+    """Configure the simulation module for one sweep point and return its parameters."""
+    dolphin_safe = max(2, int(round(grid_size * SAFE_FRACTION)))
+    dolphin_pairs = max(1, min(hd.dolphin_region_capacity(dolphin_safe), int(density * dolphin_safe * dolphin_safe / 2)))
+    human_pairs = max(1, int(density * HUMAN_CELL_FRACTION * grid_size * grid_size / 2))
+    hd.configure(grid_size=grid_size, dolphin_safe=dolphin_safe, dolphin_pairs=dolphin_pairs, human_pairs=human_pairs)
+    return {'grid_size': grid_size, 'density': density, 'dolphin_safe': dolphin_safe,
+            'dolphin_pairs': dolphin_pairs, 'human_pairs': human_pairs}
+
+
+def seed_all():
+    np.random.seed(SEED)
+    random.seed(SEED)
+
+
+def founded_grid():
+    grid = np.zeros((hd.GRID_SIZE, hd.GRID_SIZE), dtype=np.int8)
+    dolphin_pairs = []
+    hd.place_dolphin_cluster(grid, dolphin_pairs, [])
+    return grid, dolphin_pairs
+
+
+def populated_state():
+    """Grid with the dolphin cluster and the human pairs placed, as at step 15."""
+    seed_all()
+    grid, dolphin_pairs = founded_grid()
+    human_pairs = hd.random_far_apart_pairs(grid, hd.HUMAN_PAIRS, grid==hd.DOLPHIN, hd.HUMAN_PAIR_MINDIST, [])
+    return grid, dolphin_pairs, human_pairs
+
+
+# Each case is a setup() returning the call arguments (not timed) and a body(*args) (timed).
+
+def case_place_dolphin_cluster():
+    def setup():
+        return (np.zeros((hd.GRID_SIZE, hd.GRID_SIZE), dtype=np.int8), [], [])
+    return setup, hd.place_dolphin_cluster
+
+
+def case_random_far_apart_pairs():
+    def setup():
+        seed_all()
+        grid, _ = founded_grid()
+        return (grid, hd.HUMAN_PAIRS, grid==hd.DOLPHIN, hd.HUMAN_PAIR_MINDIST, [])
+    return setup, hd.random_far_apart_pairs
+
+
+def case_reproduction_step():
+    state = populated_state()
+    def setup():
+        grid, dolphin_pairs, human_pairs = state
+        return (grid.copy(), list(dolphin_pairs), list(human_pairs))
+    def body(grid, dolphin_pairs, human_pairs):
+        hd.reproduce_pairs(grid, dolphin_pairs, hd.DOLPHIN, 'DOLPHIN', 1, [])
+        hd.reproduce_pairs(grid, human_pairs, hd.HUMAN, 'HUMAN', 1, [])
+    return setup, body
+
+
+def case_illness_step():
+    state = populated_state()
+    grid0, dolphin_pairs0, human_pairs0 = state
+    # Grow the populations once so the illness step has as many pairs as mid-run
+    grid0 = grid0.copy()
+    dolphin_pairs0 = dolphin_pairs0 + hd.reproduce_pairs(grid0, dolphin_pairs0, hd.DOLPHIN, 'DOLPHIN', 1)
+    human_pairs0 = human_pairs0 + hd.reproduce_pairs(grid0, human_pairs0, hd.HUMAN, 'HUMAN', 1)
+    def setup():
+        seed_all()
+        return (grid0.copy(), list(dolphin_pairs0), list(human_pairs0))
+    def body(grid, dolphin_pairs, human_pairs):
+        hd.illness_step(grid, dolphin_pairs, 'DOLPHIN', hd.ILLNESS_RATE_DOLPHIN, 1, [])
+        hd.illness_step(grid, human_pairs, 'HUMAN', hd.ILLNESS_RATE_HUMAN, 1, [])
+    return setup, body
+
+
+def case_render_grid():
+    grid, _, _ = populated_state()
+    def setup():
+        return (grid, 15, "Humans introduced")
+    return setup, hd.render_grid
+
+
+def case_validate_pairs():
+    state = populated_state()
+    def setup():
+        return state
+    return setup, hd.validate_pairs
+
+
+def case_end_to_end(e2e_steps):
+    def setup():
+        hd.configure(timesteps=e2e_steps + 1)
+        return ()
+    def body():
+        # Creating and removing the run folder (GIF included) is part of the timed run
+        with tempfile.TemporaryDirectory(prefix='bench_e2e_') as output_dir, \
+                open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            hd.simulate(output_dir=output_dir, seed=SEED)
+    return setup, body
+
+
+def measure(setup, body, repeats):
+    times = []
+    for _ in range(repeats):
+        args = setup()
+        t0 = time.perf_counter()
+        body(*args)
+        times.append(time.perf_counter() - t0)
+    args = setup()
+    tracemalloc.start()
+    body(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = sum(times)
+    return {
+        'ops_per_sec': repeats / total if total > 0 else float('inf'),
+        'median_s': sorted(times)[len(times) // 2],
+        'min_s': min(times),
+        'peak_kib': peak / 1024,
+    }
+
+
+def run_suite(grid_sizes, densities, repeats, e2e_steps, log=print):
+    saved = (hd.GRID_SIZE, hd.DOLPHIN_SAFE, hd.DOLPHIN_PAIRS, hd.HUMAN_PAIRS, hd.TIMESTEPS)
+    results = {}
+    try:
+        for grid_size in grid_sizes:
+            for density in densities:
+                params = scenario(grid_size, density)
+                cases = [
+                    ('place_dolphin_cluster', case_place_dolphin_cluster),
+                    ('random_far_apart_pairs', case_random_far_apart_pairs),
+                    ('reproduction_step', case_reproduction_step),
+                    ('illness_step', case_illness_step),
+                    ('render_grid', case_render_grid),
+                    ('validate_pairs', case_validate_pairs),
+                    ('end_to_end', lambda: case_end_to_end(e2e_steps)),
+                ]
+                for name, factory in cases:
+                    key = f"{name}@grid={grid_size},density={density}"
+                    entry = dict(params, function=name)
+                    try:
+                        setup, body = factory()
+                        entry.update(measure(setup, body, 1 if name == 'end_to_end' else repeats))
+                        entry['error'] = None
+                        log(f"{key:<55} {entry['ops_per_sec']:>12.2f} ops/s  {entry['peak_kib']:>10.1f} KiB peak")
+                    except Exception as e:
+                        # One broken case (e.g. a missing optional dependency) must not hide the others
+                        entry['error'] = f"{type(e).__name__}: {e}"
+                        log(f"{key:<55} ERROR {entry['error']}")
+                    results[key] = entry
+                    hd.configure(timesteps=saved[4])
+    finally:
+        hd.configure(*saved)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': sys.platform,
+            'machine': platform.machine(),
+            'grid_sizes': grid_sizes,
+            'densities': densities,
+            'repeats': repeats,
+            'e2e_steps': e2e_steps,
+        },
+        'results': results,
+    }
+
+
+STARTUP_SNIPPET = """
+import time, json
+t0 = time.perf_counter()
+import human_dolphin_competition_cluster50x50 as hd
+t1 = time.perf_counter()
+import numpy as np
+hd.DOLPHIN_PAIRS = 100
+grid = np.zeros((hd.GRID_SIZE, hd.GRID_SIZE), dtype=np.int8)
+pairs = []
+hd.place_dolphin_cluster(grid, pairs, [])
+if hasattr(hd, 'reproduce_pairs'):
+    pairs.extend(hd.reproduce_pairs(grid, pairs, hd.DOLPHIN, 'DOLPHIN', 1))
+t2 = time.perf_counter()
+print(json.dumps({'import_s': t1 - t0, 'first_step_s': t2 - t0}))
+"""
+
+
+def checkout_module(rev, dest):
+    """Copy the simulation module (and its grid_competition helper) at a git revision into dest."""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    for name in ('human_dolphin_competition_cluster50x50.py', 'grid_competition.py'):
+        proc = subprocess.run(['git', 'show', f'{rev}:{name}'], cwd=repo, capture_output=True, text=True)
+        if proc.returncode == 0:
+            with open(os.path.join(dest, name), 'w') as f:
+                f.write(proc.stdout)
+    return dest
+
+
+def measure_startup(module_dir, runs):
+    """Median cold-process import time and time to the first reproduction step."""
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET], cwd=module_dir, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'exit {proc.returncode}'}
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {key: sorted(s[key] for s in samples)[len(samples) // 2] for key in ('import_s', 'first_step_s')}
+
+
+def run_startup(against, runs):
+    results = {}
+    # The revision's checkout only lives for the measurement
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as checkout:
+        targets = [('current', os.path.dirname(os.path.abspath(__file__)))]
+        if against:
+            targets.insert(0, (against, checkout_module(against, checkout)))
+        for label, module_dir in targets:
+            results[label] = measure_startup(module_dir, runs)
+            res = results[label]
+            if 'error' in res:
+                print(f"{label:<12} ERROR {res['error']}")
+            else:
+                print(f"{label:<12} import {res['import_s']*1000:8.1f} ms   first step {res['first_step_s']*1000:8.1f} ms")
+    return {'meta': {'timestamp': datetime.now().isoformat(), 'python': platform.python_version(), 'runs': runs}, 'results': results}
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Return a list of (key, description) regressions. A case that ran in the baseline but is
+    missing or fails in the current results counts as a regression; cases that already
+    failed in the baseline have nothing to compare against and are skipped.
+    """
+    regressions = []
+    for key, base in baseline['results'].items():
+        if base.get('error'):
+            continue
+        cur = current['results'].get(key)
+        if cur is None:
+            regressions.append((key, 'missing from the current results'))
+            continue
+        if cur.get('error'):
+            regressions.append((key, f"now fails: {cur['error']}"))
+            continue
+        slowdown = 1 - cur['ops_per_sec'] / base['ops_per_sec']
+        if slowdown > threshold:
+            regressions.append((key, f"ops_per_sec {base['ops_per_sec']:.2f} -> {cur['ops_per_sec']:.2f} ({-slowdown:+.1%})"))
+        if base['peak_kib'] > 0:
+            growth = cur['peak_kib'] / base['peak_kib'] - 1
+            if growth > threshold:
+                regressions.append((key, f"peak_kib {base['peak_kib']:.2f} -> {cur['peak_kib']:.2f} ({growth:+.1%})"))
+    return regressions
+
+
+def export_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark suite for the Human-Dolphin simulation hot paths')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='Run the benchmark sweep and save the results as a JSON baseline')
+    run.add_argument('--grid-sizes', type=int, nargs='+', default=DEFAULT_GRID_SIZES, help=f'Grid edge lengths to sweep (default: {DEFAULT_GRID_SIZES})')
+    run.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES, help=f'Population densities to sweep (default: {DEFAULT_DENSITIES})')
+    run.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help=f'Timed repetitions per case (default: {DEFAULT_REPEATS})')
+    run.add_argument('--e2e-steps', type=int, default=DEFAULT_E2E_STEPS, help=f'Steps for the end-to-end run (default: {DEFAULT_E2E_STEPS})')
+    run.add_argument('--output', type=str, default='benchmark_results.json', help='Output JSON path')
+    cmp_ = sub.add_parser('compare', help='Compare results against a baseline and flag regressions')
+    cmp_.add_argument('baseline', type=str, help='Baseline JSON')
+    cmp_.add_argument('current', type=str, nargs='?', default=None, help="Current JSON (default: run the baseline's sweep now)")
+    cmp_.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help=f'Allowed relative slowdown / memory growth (default: {DEFAULT_THRESHOLD})')
+    st = sub.add_parser('startup', help='Measure cold import and time to first step in fresh processes')
+    st.add_argument('--against', type=str, default=None, help='Git revision to measure as well, for a before/after comparison')
+    st.add_argument('--runs', type=int, default=5, help='Fresh processes per target; the median is reported (default: 5)')
+    st.add_argument('--output', type=str, default=None, help='Optional output JSON path')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == 'run':
+        data = run_suite(args.grid_sizes, args.densities, args.repeats, args.e2e_steps)
+        export_json(data, args.output)
+        print(f"Results saved to: {args.output}")
+        return
+    if args.command == 'startup':
+        data = run_startup(args.against, args.runs)
+        if args.output:
+            export_json(data, args.output)
+            print(f"Results saved to: {args.output}")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        meta = baseline['meta']
+        current = run_suite(meta['grid_sizes'], meta['densities'], meta['repeats'], meta['e2e_steps'])
+    regressions = compare_results(baseline, current, args.threshold)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} ({len(baseline['results'])} cases)")
+        return
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for key, description in regressions:
+        print(f"  {key}: {description}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
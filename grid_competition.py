@@ -99,12 +99,19 @@ def main():
     output_paths = setup_output_paths(args)
     with open(output_paths['summary'], 'w') as f:
         f.write('Simulation summary...\n')
+    pop_stats = [(step, 42, 24) for step in range(args.steps)]
     with open(output_paths['population'], 'w') as f:
         f.write('step, dolphins, humans\n')
-        for step in range(args.steps):
-            f.write(f"{step}, 42, 24\n")
+        for step, dolphins, humans in pop_stats:
+            f.write(f"{step}, {dolphins}, {humans}\n")
     with open(output_paths['log'], 'w') as f:
         f.write('Log output for this run.\n')
+    # Index the run (seed, steps, final counts) in the catalog of its runs root
+    from run_catalog import register_run
+    mode = 'demo' if args.demo else 'test' if args.test else 'run'
+    final_d, final_h = pop_stats[-1][1:] if pop_stats else (None, None)
+    register_run(output_paths['base_output_dir'], 'grid_competition', {'steps': args.steps, 'mode': mode}, args.seed,
+                 final_d, final_h, pop_stats, output_paths)
     print(f"All outputs for this run: {output_paths['base_output_dir']}")
 
 if __name__ == '__main__':
@@ -1,21 +1,39 @@
+"""
+Human-Dolphin competition on a 50x50 grid: a central dolphin cluster is founded at step 0,
+human pairs are introduced at step 15, both species reproduce into free space and lose a
+fixed share of pairs to illness every step.
+
+The module doubles as a library. Its core (placement, reproduce_pairs, illness_step,
+validate_pairs, simulate(render=False)) needs only NumPy; importing it has no side effects.
+matplotlib and imageio are imported lazily, the first time a frame or GIF is produced.
+Seeding happens in simulate(seed=...), and outputs go into a per-run versioned folder
+(see grid_competition.setup_output_paths) unless an explicit output_dir is given.
+"""
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import patches
-from matplotlib import colors
-import imageio
 import random
+import os
+import time
+import argparse
+import contextlib
 from datetime import datetime
 
-np.random.seed(42)
-random.seed(42)
+from grid_competition import setup_output_paths
+
+SEED = 42
+
+def dolphin_region_capacity(dolphin_safe):
+    """Most pairs place_dolphin_cluster can fit in a dolphin_safe x dolphin_safe region."""
+    # Horizontal pass: floor(safe/2) pairs per row; an odd edge leaves one column for the vertical pass
+    return (dolphin_safe // 2) * dolphin_safe + (dolphin_safe % 2) * (dolphin_safe // 2)
 
 GRID_SIZE = 50
 TIMESTEPS = 151
-DOLPHIN_PAIRS = 375
 HUMAN_PAIRS = 125
 PAIR_SIZE = 2
 DOLPHIN_SAFE = 15
+# Fill the safe zone completely (112 pairs for 15x15); 375 pairs (750 cells) never fit in 225 cells
+DOLPHIN_PAIRS = dolphin_region_capacity(DOLPHIN_SAFE)
 ILLNESS_RATE_DOLPHIN = 0.01
 ILLNESS_RATE_HUMAN = 0.02
 HUMAN_PAIR_MINDIST = 6
@@ -25,6 +43,74 @@ EMPTY = 0
 DOLPHIN = 1
 HUMAN = 2
 
+STEP_COUNTER_FIELDS = ('step', 'births_attempted', 'births', 'cells_scanned', 'deaths')
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase (with timer.phase('render'): ...).
+    A disabled timer hands out one shared no-op context, so leaving the
+    `with` blocks in the step loop costs next to nothing.
+    """
+    _NULL = contextlib.nullcontext()
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals = {}
+        self.calls = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return self._NULL
+        return _TimedPhase(self, name)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def report(self):
+        total = sum(self.totals.values()) or 1.0
+        return [f"* {name}: {secs:.3f}s ({secs/total*100:.1f}%, {self.calls[name]} calls)"
+                for name, secs in sorted(self.totals.items(), key=lambda kv: -kv[1])]
+
+class _TimedPhase:
+    __slots__ = ('timer', 'name', 't0')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+def new_step_counters(step):
+    counters = dict.fromkeys(STEP_COUNTER_FIELDS, 0)
+    counters['step'] = step
+    return counters
+
+def configure(grid_size=None, dolphin_safe=None, dolphin_pairs=None, human_pairs=None, timesteps=None):
+    """
+    Override the scenario constants (e.g. for benchmarks or parameter sweeps) and recompute
+    the derived dolphin region. Arguments left as None keep their current value.
+    """
+    global GRID_SIZE, DOLPHIN_SAFE, DOLPHIN_PAIRS, HUMAN_PAIRS, TIMESTEPS, DOLPHIN_REGION_START, DOLPHIN_REGION_END
+    if grid_size is not None:
+        GRID_SIZE = grid_size
+    if dolphin_safe is not None:
+        DOLPHIN_SAFE = dolphin_safe
+    if dolphin_pairs is not None:
+        DOLPHIN_PAIRS = dolphin_pairs
+    if human_pairs is not None:
+        HUMAN_PAIRS = human_pairs
+    if timesteps is not None:
+        TIMESTEPS = timesteps
+    DOLPHIN_REGION_START = (GRID_SIZE//2 - DOLPHIN_SAFE//2, GRID_SIZE//2 - DOLPHIN_SAFE//2)
+    DOLPHIN_REGION_END = (DOLPHIN_REGION_START[0] + DOLPHIN_SAFE, DOLPHIN_REGION_START[1] + DOLPHIN_SAFE)
+
 def position_in_dolphin_zone(r, c):
     return (DOLPHIN_REGION_START[0] <= r < DOLPHIN_REGION_END[0] and DOLPHIN_REGION_START[1] <= c < DOLPHIN_REGION_END[1])
 
@@ -126,11 +212,73 @@ def random_far_apart_pairs(grid, N_pairs, avoid_mask, min_dist, log_lines, speci
             raise RuntimeError("Grid too full for all pairs!")
     return pairs
 
+def reproduce_pairs(grid, pairs, code, species, step, birth_events=None, counters=None):
+    """
+    Copulation rule: every cell of every pair may found one new pair of the same species
+    in the first free neighbour cell plus a free cell next to it. Bounds come from
+    grid.shape, so the rule works on any grid (including the tiled engine's memmap).
+    Returns the list of newly born pairs; the caller decides when to merge them in.
+    If a counters dict is given, births_attempted/births/cells_scanned are added to it.
+    """
+    n_rows, n_cols = grid.shape
+    added = []
+    scanned = 0
+    for pair in pairs:
+        for anchor in pair:
+            r,c = anchor
+            for dr,dc in [(-1,0),(1,0),(0,-1),(0,1)]:
+                nr,nc = r+dr,c+dc
+                scanned += 1
+                if 0<=nr<n_rows and 0<=nc<n_cols and grid[nr,nc]==EMPTY:
+                    for sdr,sdc in [(-1,0),(1,0),(0,-1),(0,1)]:
+                        nnr, nnc = nr+sdr, nc+sdc
+                        scanned += 1
+                        if 0<=nnr<n_rows and 0<=nnc<n_cols and grid[nnr,nnc]==EMPTY and (nnr,nnc)!=(r,c):
+                            grid[nr,nc]=code
+                            grid[nnr,nnc]=code
+                            added.append( [(nr,nc),(nnr,nnc)] )
+                            if birth_events is not None:
+                                birth_events.append( (step, species, nr, nc, nnr, nnc) )
+                            break
+                    break
+    if counters is not None:
+        counters['births_attempted'] += sum(len(pair) for pair in pairs)
+        counters['births'] += len(added)
+        counters['cells_scanned'] += scanned
+    return added
+
+def illness_step(grid, pairs, species, ill_rate, step, illness_events=None, rng=np.random):
+    """
+    Illness rule: int(len(pairs)*ill_rate) randomly chosen pairs die and their cells are
+    emptied. Pairs are removed from the list in place; returns the number of deaths.
+    """
+    if len(pairs)==0:
+        return 0
+    N_die = int(len(pairs)*ill_rate)
+    if N_die>0:
+        to_kill = rng.choice( len(pairs), N_die, replace=False )
+        kill_idx_sorted = sorted(to_kill, reverse=True)
+        for idx in kill_idx_sorted:
+            for cell in pairs[idx]:
+                grid[cell[0],cell[1]] = EMPTY
+            if illness_events is not None:
+                illness_events.append( (step, species, pairs[idx][0], pairs[idx][1]) )
+            del pairs[idx]
+    return N_die
+
 def render_grid(grid, step, annotate=None):
+    # Imported here so headless runs never pay for matplotlib; the Agg canvas is used
+    # directly (no pyplot), so no GUI backend is ever selected in worker processes.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib import patches
+    from matplotlib import colors
     cmap = colors.ListedColormap(["white", "#2699c6", "#f17664"])
     norm = colors.BoundaryNorm([0,1,2,3], cmap.N)
-    fig,ax = plt.subplots(figsize=(5,5))
-    ax.imshow(grid, cmap=cmap, norm=norm, vmin=0, vmax=2)
+    fig = Figure(figsize=(5,5))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.imshow(grid, cmap=cmap, norm=norm)
     ax.set_xticks([])
     ax.set_yticks([])
     text = f"Step {step}"
@@ -143,10 +291,8 @@ def render_grid(grid, step, annotate=None):
         rect = patches.Rectangle( (dc0-0.5,dr0-0.5), size, size, linewidth=2,edgecolor='navy',facecolor='none',ls='dashed')
         ax.add_patch(rect)
     fig.tight_layout(pad=0)
-    fig.canvas.draw()
-    img_arr = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8)
-    img_arr = img_arr.reshape(fig.canvas.get_width_height()[::-1]+(3,))
-    plt.close(fig)
+    canvas.draw()
+    img_arr = np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
     return img_arr
 
 def validate_pairs(grid, dolphin_pairs, human_pairs):
@@ -203,7 +349,31 @@ def fix_pair_overlaps(grid, dolphin_pairs, human_pairs, log_path):
                 with open(log_path,'a') as f:
                     f.write(f"Human fix overlapping at {cell}\n")
 
-def simulate():
+def default_output_dir(base_dir=None):
+    """Create and return a fresh <timestamp>_<uuid> run folder (grid_competition's policy)."""
+    args = argparse.Namespace(output_dir=base_dir, demo=False, test=False)
+    return setup_output_paths(args)['base_output_dir']
+
+def simulate(output_dir=None, instrument=False, seed=SEED, render=True, catalog_root=None):
+    """
+    Run the full scenario and write GIF, log and summary into output_dir (a new
+    versioned run folder if None). render=False skips frames and the GIF, so the run
+    needs NumPy only. The finished run is recorded in the run catalog (see run_catalog.py)
+    of catalog_root, which defaults to the runs root when simulate() creates the run folder
+    itself; a caller-supplied output_dir is left alone unless catalog_root is given.
+    Returns final counts, the population time series and the paths.
+    With instrument=True the step loop is timed per phase and per-step counters
+    (births attempted/succeeded, cells scanned, deaths) are collected; the breakdown
+    goes into the summary and a per-step table into ..._steps.txt.
+    """
+    if output_dir is None:
+        output_dir = default_output_dir()
+        if catalog_root is None:
+            catalog_root = os.path.dirname(output_dir)
+    np.random.seed(seed)
+    random.seed(seed)
+    timer = PhaseTimer(enabled=instrument)
+    step_counters = []
     log_lines = []
     birth_events = []
     illness_events = []
@@ -213,98 +383,75 @@ def simulate():
     dolphin_pairs = []
     human_pairs = []
     # Step 0: Founding dolphins
-    place_dolphin_cluster(grid, dolphin_pairs, log_lines)
+    with timer.phase('placement'):
+        place_dolphin_cluster(grid, dolphin_pairs, log_lines)
     pop_stats.append( (0, len(dolphin_pairs)*PAIR_SIZE, 0) )
-    img = render_grid(grid, 0, annotate="Founding dolphin cluster (750)")
-    frames.append(img)
+    if render:
+        with timer.phase('render'):
+            frames.append(render_grid(grid, 0, annotate=f"Founding dolphin cluster ({len(dolphin_pairs)*PAIR_SIZE})"))
     log_lines.append(f"{datetime.now().isoformat()} | Step 0: {len(dolphin_pairs)*PAIR_SIZE} dolphins placed in cluster.")
     for step in range(1, TIMESTEPS):
+        counters = new_step_counters(step) if instrument else None
         if step==15:
-            avoid_mask = (grid==DOLPHIN)
-            new_pairs = random_far_apart_pairs(grid, HUMAN_PAIRS, avoid_mask, HUMAN_PAIR_MINDIST, log_lines)
-            human_pairs = new_pairs.copy()
+            with timer.phase('placement'):
+                avoid_mask = (grid==DOLPHIN)
+                new_pairs = random_far_apart_pairs(grid, HUMAN_PAIRS, avoid_mask, HUMAN_PAIR_MINDIST, log_lines)
+                human_pairs = new_pairs.copy()
             log_lines.append(f"{datetime.now().isoformat()} | Step 15: {len(human_pairs)*2} humans introduced.")
-        added_dolphin_pairs = []
-        added_human_pairs = []
-        # Dolphins reproduce
-        for pair in dolphin_pairs:
-            for anchor in pair:
-                r,c = anchor
-                for dr,dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                    nr,nc = r+dr,c+dc
-                    if 0<=nr<GRID_SIZE and 0<=nc<GRID_SIZE and grid[nr,nc]==EMPTY:
-                        for sdr,sdc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                            nnr, nnc = nr+sdr, nc+sdc
-                            if 0<=nnr<GRID_SIZE and 0<=nnc<GRID_SIZE and grid[nnr,nnc]==EMPTY and (nnr,nnc)!=(r,c):
-                                grid[nr,nc]=DOLPHIN
-                                grid[nnr,nnc]=DOLPHIN
-                                added_dolphin_pairs.append( [(nr,nc),(nnr,nnc)] )
-                                birth_events.append( (step, 'DOLPHIN', nr, nc, nnr, nnc) )
-                                break
-                        break
-        # Humans reproduce
-        for pair in human_pairs:
-            for anchor in pair:
-                r,c = anchor
-                for dr,dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                    nr,nc = r+dr,c+dc
-                    if 0<=nr<GRID_SIZE and 0<=nc<GRID_SIZE and grid[nr,nc]==EMPTY:
-                        for sdr,sdc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                            nnr, nnc = nr+sdr, nc+sdc
-                            if 0<=nnr<GRID_SIZE and 0<=nnc<GRID_SIZE and grid[nnr,nnc]==EMPTY and (nnr,nnc)!=(r,c):
-                                grid[nr,nc]=HUMAN
-                                grid[nnr,nnc]=HUMAN
-                                added_human_pairs.append( [(nr,nc),(nnr,nnc)] )
-                                birth_events.append( (step, 'HUMAN', nr, nc, nnr, nnc) )
-                                break
-                        break
-        dolphin_pairs.extend(added_dolphin_pairs)
-        human_pairs.extend(added_human_pairs)
+        with timer.phase('reproduction'):
+            # Dolphins reproduce
+            added_dolphin_pairs = reproduce_pairs(grid, dolphin_pairs, DOLPHIN, 'DOLPHIN', step, birth_events, counters)
+            # Humans reproduce
+            added_human_pairs = reproduce_pairs(grid, human_pairs, HUMAN, 'HUMAN', step, birth_events, counters)
+            dolphin_pairs.extend(added_dolphin_pairs)
+            human_pairs.extend(added_human_pairs)
         # Illness random removal
-        if step>0:
-            for species, pairs, code, ill_rate in [ ('DOLPHIN',dolphin_pairs,DOLPHIN,ILLNESS_RATE_DOLPHIN), ('HUMAN',human_pairs,HUMAN,ILLNESS_RATE_HUMAN) ]:
-                if len(pairs)==0:
-                    continue
-                N_die = int(len(pairs)*ill_rate)
-                if N_die>0:
-                    to_kill = np.random.choice( len(pairs), N_die, replace=False )
-                    kill_idx_sorted = sorted(to_kill, reverse=True)
-                    for idx in kill_idx_sorted:
-                        for cell in pairs[idx]:
-                            grid[cell[0],cell[1]] = EMPTY
-                        illness_events.append( (step, species, pairs[idx][0], pairs[idx][1]) )
-                        del pairs[idx]
+        with timer.phase('illness'):
+            if step>0:
+                deaths = illness_step(grid, dolphin_pairs, 'DOLPHIN', ILLNESS_RATE_DOLPHIN, step, illness_events)
+                deaths += illness_step(grid, human_pairs, 'HUMAN', ILLNESS_RATE_HUMAN, step, illness_events)
         N_d = len(dolphin_pairs)*PAIR_SIZE
         N_h = len(human_pairs)*PAIR_SIZE
         pop_stats.append( (step, N_d, N_h) )
-        if step == 15:
-            img = render_grid(grid, step, annotate="Humans introduced (250)")
-        else:
-            img = render_grid(grid, step)
-        frames.append(img)
+        if render:
+            with timer.phase('render'):
+                if step == 15:
+                    frames.append(render_grid(grid, step, annotate="Humans introduced (250)"))
+                else:
+                    frames.append(render_grid(grid, step))
         # Log step stats
-        log_lines.append(f"{datetime.now().isoformat()} | Step {step}: {N_d} dolphins, {N_h} humans. Births: {len(added_dolphin_pairs)+len(added_human_pairs)}. Deaths: {len(illness_events)}")
+        with timer.phase('logging'):
+            log_lines.append(f"{datetime.now().isoformat()} | Step {step}: {N_d} dolphins, {N_h} humans. Births: {len(added_dolphin_pairs)+len(added_human_pairs)}. Deaths: {len(illness_events)}")
+        if counters is not None:
+            counters['deaths'] = deaths
+            step_counters.append(counters)
     # Write GIF
-    gif_path = '/root/human_dolphin_competition_cluster50x50.gif'
-    imageio.mimsave(gif_path, frames, duration=0.18)
+    gif_path = None
+    if render:
+        import imageio
+        gif_path = os.path.join(output_dir, 'human_dolphin_competition_cluster50x50.gif')
+        with timer.phase('gif'):
+            imageio.mimsave(gif_path, frames, duration=0.18)
     # Write log
-    log_path = '/root/human_dolphin_competition_cluster50x50_log.txt'
-    with open(log_path,'w') as f:
-        for l in log_lines:
-            f.write(l+'\n')
-        f.write('--- Major births ---\n')
-        for b in birth_events:
-            f.write(f"{b}\n")
-        f.write('--- Major illness events ---\n')
-        for ie in illness_events:
-            f.write(f"{ie}\n")
-    ok, problems = validate_pairs(grid, dolphin_pairs, human_pairs)
-    if not ok:
-        with open(log_path,'a') as f:
-            f.write('*** Pair placement validation: problems found!\n')
-            for pl in problems:
-                f.write(pl+'\n')
-        fix_pair_overlaps(grid, dolphin_pairs, human_pairs, log_path)
+    log_path = os.path.join(output_dir, 'human_dolphin_competition_cluster50x50_log.txt')
+    with timer.phase('logging'):
+        with open(log_path,'w') as f:
+            for l in log_lines:
+                f.write(l+'\n')
+            f.write('--- Major births ---\n')
+            for b in birth_events:
+                f.write(f"{b}\n")
+            f.write('--- Major illness events ---\n')
+            for ie in illness_events:
+                f.write(f"{ie}\n")
+    with timer.phase('validation'):
+        ok, problems = validate_pairs(grid, dolphin_pairs, human_pairs)
+        if not ok:
+            with open(log_path,'a') as f:
+                f.write('*** Pair placement validation: problems found!\n')
+                for pl in problems:
+                    f.write(pl+'\n')
+            fix_pair_overlaps(grid, dolphin_pairs, human_pairs, log_path)
     final_d = len(dolphin_pairs)*PAIR_SIZE
     final_h = len(human_pairs)*PAIR_SIZE
     summary = [
@@ -317,14 +464,75 @@ def simulate():
         f"* Copulation: each pair may reproduce if local free space available",
         f"* Humans placed at min Manhattan dist={HUMAN_PAIR_MINDIST} (or relaxed to 2 if grid too full)",
         f"Outcome: {'Humans survived' if final_h>0 else 'Humans eliminated'}, {'Dolphins survived' if final_d>0 else 'Dolphins eliminated' if final_d==0 else ''}",
-        f"Total steps: {TIMESTEPS-1}",
+        f"Total steps: {TIMESTEPS-1}, seed: {seed}",
         f"Check log for detailed event and placement audit."
     ]
-    summary_path = '/root/human_dolphin_competition_cluster50x50_summary.txt'
+    if instrument:
+        summary.append("Phase breakdown (wall time):")
+        summary.extend(timer.report())
+        totals = {k: sum(c[k] for c in step_counters) for k in STEP_COUNTER_FIELDS[1:]}
+        summary.append("Step counters (totals): " + ", ".join(f"{k}={v}" for k,v in totals.items()))
+        steps_path = os.path.join(output_dir, 'human_dolphin_competition_cluster50x50_steps.txt')
+        with open(steps_path,'w') as f:
+            f.write(', '.join(STEP_COUNTER_FIELDS)+'\n')
+            for c in step_counters:
+                f.write(', '.join(str(c[k]) for k in STEP_COUNTER_FIELDS)+'\n')
+    summary_path = os.path.join(output_dir, 'human_dolphin_competition_cluster50x50_summary.txt')
     with open(summary_path,'w') as f:
         for line in summary:
             f.write(line+'\n')
-    print(f"---- Finished simulation ----\nSee: {gif_path}\nLog: {log_path}\nSummary: {summary_path}")
+    paths = {'gif': gif_path, 'log': log_path, 'summary': summary_path}
+    if catalog_root is not None:
+        from run_catalog import register_run
+        params = {'grid_size': GRID_SIZE, 'steps': TIMESTEPS-1, 'dolphin_safe': DOLPHIN_SAFE,
+                  'dolphin_pairs': DOLPHIN_PAIRS, 'human_pairs': HUMAN_PAIRS,
+                  'illness_rate_dolphin': ILLNESS_RATE_DOLPHIN, 'illness_rate_human': ILLNESS_RATE_HUMAN,
+                  'human_pair_mindist': HUMAN_PAIR_MINDIST, 'render': render}
+        paths['series'] = register_run(output_dir, 'human_dolphin_competition_cluster50x50', params, seed,
+                                       final_d, final_h, pop_stats, paths, root=catalog_root)
+    print(f"---- Finished simulation ----\nSee: {gif_path or '(rendering disabled)'}\nLog: {log_path}\nSummary: {summary_path}")
+    return {
+        'output_dir': output_dir,
+        'seed': seed,
+        'final_dolphins': final_d,
+        'final_humans': final_h,
+        'pop_stats': pop_stats,
+        'paths': paths,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Human-Dolphin competition on a 50x50 grid (central dolphin cluster, humans introduced at step 15).")
+    parser.add_argument('--output-dir', type=str, default=None, help="Base directory for the per-run versioned output subfolder (default: $HOME/simulation_runs or ./outputs)")
+    parser.add_argument('--seed', type=int, default=SEED, help=f'Random seed (default: {SEED})')
+    parser.add_argument('--dolphin-pairs', type=int, default=DOLPHIN_PAIRS, help=f'Dolphin pairs founded in the safe zone, at most {dolphin_region_capacity(DOLPHIN_SAFE)} (default: {DOLPHIN_PAIRS})')
+    parser.add_argument('--no-render', action='store_true', help='Headless run: skip frame rendering and the GIF (no matplotlib/imageio needed)')
+    parser.add_argument('--instrument', action='store_true', help='Time each phase of the step loop and collect per-step counters; the breakdown is added to the summary')
+    parser.add_argument('--profile', action='store_true', help='Run under cProfile (implies --instrument); writes profile.pstats and profile.txt into the run directory')
+    args = parser.parse_args()
+    capacity = dolphin_region_capacity(DOLPHIN_SAFE)
+    if not 1 <= args.dolphin_pairs <= capacity:
+        # Checked here so an impossible request fails before a run folder is created
+        parser.error(f'--dolphin-pairs must be between 1 and {capacity} (the {DOLPHIN_SAFE}x{DOLPHIN_SAFE} safe zone holds {capacity} pairs)')
+    return args
+
+def main():
+    args = parse_args()
+    configure(dolphin_pairs=args.dolphin_pairs)
+    output_dir = default_output_dir(args.output_dir)
+    if not args.profile:
+        simulate(output_dir, instrument=args.instrument, seed=args.seed, render=not args.no_render,
+                 catalog_root=os.path.dirname(output_dir))
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.runcall(simulate, output_dir, instrument=True, seed=args.seed, render=not args.no_render,
+                     catalog_root=os.path.dirname(output_dir))
+    profiler.dump_stats(os.path.join(output_dir, 'profile.pstats'))
+    with open(os.path.join(output_dir, 'profile.txt'),'w') as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats('cumulative').print_stats(40)
+    print(f"Profile: {os.path.join(output_dir, 'profile.pstats')}")
 
 if __name__ == "__main__":
-    simulate()
+    main()
@@ -1,37 +1,175 @@
 import os
+import json
+import asyncio
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext, suppress
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import httpx
 from datetime import datetime
 
-app = FastAPI()
-
 OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://host.docker.internal:11434/api/generate")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "gemma3")
+# How long Ollama keeps the model loaded after a request (Ollama duration string or seconds)
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_WARMUP = os.environ.get("OLLAMA_WARMUP", "1") != "0"
+# Maximum number of conversations (context_id) whose Ollama context is kept; oldest evicted first
+SESSION_MAX = int(os.environ.get("A2A_SESSION_MAX", "256"))
+# Upper bound on Ollama requests in flight per /a2a/batch call; a request may ask for fewer
+BATCH_CONCURRENCY = int(os.environ.get("A2A_BATCH_CONCURRENCY", "4"))
+
+# context_id -> Ollama "context" token array from the previous turn, in LRU order
+sessions = OrderedDict()
+# context_id -> lock held for a whole turn; entries disappear once no turn holds or waits for them
+session_locks = weakref.WeakValueDictionary()
+
+def get_session_context(context_id):
+    if context_id is None or context_id not in sessions:
+        return None
+    sessions.move_to_end(context_id)
+    return sessions[context_id]
+
+def session_lock(context_id):
+    """
+    Serialize turns of one conversation: each turn reads the previous context and stores the
+    new one, so two concurrent turns would both continue from the same context and one would
+    be lost. Waiters get the lock in arrival order (asyncio.Lock is FIFO).
+    """
+    if context_id is None:
+        return nullcontext()
+    lock = session_locks.get(context_id)
+    if lock is None:
+        lock = session_locks[context_id] = asyncio.Lock()
+    return lock
+
+def store_session_context(context_id, context):
+    if context_id is None or not context:
+        return
+    sessions[context_id] = context
+    sessions.move_to_end(context_id)
+    while len(sessions) > SESSION_MAX:
+        sessions.popitem(last=False)
+
+async def warm_up_model():
+    """Ask Ollama to load the model (a generate call without prompt) so the first real turn does not pay for it."""
+    try:
+        async with httpx.AsyncClient() as client:
+            resp = await client.post(OLLAMA_URL, json={"model": OLLAMA_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE}, timeout=300)
+            resp.raise_for_status()
+    except Exception as e:
+        print(f"WARNING: Ollama warm-up failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.warm_up = None
+    if OLLAMA_WARMUP:
+        # Run in the background so the agent accepts requests while the model loads
+        app.state.warm_up = asyncio.create_task(warm_up_model())
+    yield
+    if app.state.warm_up is not None:
+        # Do not keep shutdown waiting on a model that is still loading
+        app.state.warm_up.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.warm_up
+
+app = FastAPI(lifespan=lifespan)
+
+async def generate(client, prompt, context_id=None):
+    """Send one prompt to Ollama, continuing context_id's session if there is one, and return the answer text."""
+    ollama_payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE}
+    context = get_session_context(context_id)
+    if context is not None:
+        # Ollama continues from the cached token context instead of re-processing the history
+        ollama_payload["context"] = context
+    resp = await client.post(OLLAMA_URL, json=ollama_payload, timeout=60)
+    resp.raise_for_status()
+    ollama_data = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
+    if "response" in ollama_data:
+        answer = ollama_data["response"]
+    elif "message" in ollama_data:
+        answer = ollama_data["message"]
+    else:
+        answer = resp.text
+    store_session_context(context_id, ollama_data.get("context"))
+    return answer
 
 @app.post("/a2a", response_class=JSONResponse)
 async def a2a_endpoint(request: Request):
     data = await request.json()
     prompt = data.get("prompt") or data.get("message")
-    if not prompt:
+    context_id = data.get("context_id")
+    if not prompt and not data.get("reset"):
         return JSONResponse(status_code=400, content={"error": "Missing 'prompt' or 'message' in request."})
-    ollama_payload = {"model": OLLAMA_MODEL, "prompt": prompt}
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(OLLAMA_URL, json=ollama_payload, timeout=60)
-            resp.raise_for_status()
-            ollama_data = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
-        # Ollama returns streaming by default; force non-stream in payload if needed
-        if "response" in ollama_data:
-            answer = ollama_data["response"]
-        elif "message" in ollama_data:
-            answer = ollama_data["message"]
-        else:
-            answer = resp.text
+        async with session_lock(context_id):
+            if data.get("reset") and context_id is not None:
+                sessions.pop(context_id, None)
+            if not prompt:
+                return JSONResponse(content={"text": "", "context_id": context_id, "reset": True})
+            async with httpx.AsyncClient() as client:
+                answer = await generate(client, prompt, context_id)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
     # FastA2A response format: {"text": ...}
-    return JSONResponse(content={"text": answer})
+    content = {"text": answer}
+    if context_id is not None:
+        content["context_id"] = context_id
+    return JSONResponse(content=content)
+
+@app.post("/a2a/batch")
+async def a2a_batch_endpoint(request: Request):
+    """
+    Run a list of prompts concurrently and stream one NDJSON line per item as soon as it
+    completes: {"id": ..., "text": ...} or {"id": ..., "error": ...}. Items are strings or
+    objects with "prompt"/"message" and an optional "id" (defaults to the list index) and "context_id".
+    Items sharing a context_id are sent one after another, in list order, each continuing the previous turn.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Request body must be JSON."})
+    items = data.get("prompts") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return JSONResponse(status_code=400, content={"error": "Missing 'prompts' list in request."})
+    try:
+        concurrency = max(1, min(int(data.get("concurrency") or BATCH_CONCURRENCY), BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return JSONResponse(status_code=400, content={"error": "'concurrency' must be an integer."})
+
+    async def run_item(client, semaphore, index, item):
+        if isinstance(item, str):
+            item = {"prompt": item}
+        if not isinstance(item, dict):
+            return {"id": index, "error": "Item must be a string or an object."}
+        item_id = item.get("id", index)
+        prompt = item.get("prompt") or item.get("message")
+        if not prompt:
+            return {"id": item_id, "error": "Missing 'prompt' or 'message' in item."}
+        context_id = item.get("context_id")
+        try:
+            # Items of one conversation run one after another in list order (tasks reach the
+            # lock in creation order); waiting for the lock does not take a concurrency slot
+            async with session_lock(context_id), semaphore:
+                answer = await generate(client, prompt, context_id)
+        except Exception as e:
+            return {"id": item_id, "error": str(e)}
+        return {"id": item_id, "text": answer}
+
+    async def stream_results():
+        semaphore = asyncio.Semaphore(concurrency)
+        # One client for the whole batch so connections to Ollama are reused
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+            tasks = [asyncio.create_task(run_item(client, semaphore, i, item)) for i, item in enumerate(items)]
+            try:
+                for done in asyncio.as_completed(tasks):
+                    yield json.dumps(await done) + "\n"
+            finally:
+                # Client went away mid-stream: do not keep Ollama busy with orphaned prompts
+                for task in tasks:
+                    task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 @app.get("/.well-known/agent.json", response_class=JSONResponse)
 def agent_metadata():
@@ -45,6 +183,7 @@ def agent_metadata():
         "protocol": { "name": "FastA2A", "version": "0.2" },
         "endpoints": {
             "a2a": "http://localhost:8000/a2a",
+            "a2a_batch": "http://localhost:8000/a2a/batch",
             "metadata": "http://localhost:8000/.well-known/agent.json",
             "health": "http://localhost:8000/healthz"
         },
@@ -0,0 +1,278 @@
+"""
+Run Catalog
+
+Indexes simulation run folders (the <timestamp>_<uuid> directories created by setup_output_paths
+in grid_competition.py) in a local SQLite database, so runs can be filtered and aggregated without
+opening thousands of summary/population files by hand.
+
+**Layout:**
+- One catalog per runs root: <root>/catalog.sqlite, next to the run folders it indexes
+  (root defaults to $HOME/simulation_runs, else ./outputs, like setup_output_paths).
+- Each run gets one row: parameters (grid_size, steps, plus the full set as JSON), seed,
+  final counts and the paths of its output files.
+- The population time series is stored next to each run as population.npz
+  (columns step / dolphins / humans, int32, compressed).
+
+**Registration:**
+- Simulations call register_run() when they finish.
+- Folders the catalog has not seen yet (older runs, library runs written to an explicit
+  output_dir, crashed registrations) are picked up by scan(), which only opens directories
+  that are not indexed or were indexed incomplete (no summary / final counts yet), so
+  starting the catalog on a large runs root stays cheap.
+
+**Usage:**
+- python3 run_catalog.py scan
+- python3 run_catalog.py query --where "final_humans = 0" --columns run_id seed final_dolphins
+- python3 run_catalog.py query --group-by grid_size --agg "count(*)" --agg "avg(final_humans)"
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+CATALOG_NAME = 'catalog.sqlite'
+SERIES_NAME = 'population.npz'
+RUN_DIR_RE = re.compile(r'^(?:(demo_run|test_run)_)?(\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2})_([0-9a-f-]{36})$')
+COLUMNS = ('run_id', 'run_dir', 'mode', 'started', 'source', 'grid_size', 'steps', 'seed', 'params',
+           'final_dolphins', 'final_humans', 'summary_path', 'population_path', 'series_path', 'registered')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    run_dir TEXT NOT NULL,
+    mode TEXT,
+    started TEXT,
+    source TEXT,
+    grid_size INTEGER,
+    steps INTEGER,
+    seed INTEGER,
+    params TEXT,
+    final_dolphins INTEGER,
+    final_humans INTEGER,
+    summary_path TEXT,
+    population_path TEXT,
+    series_path TEXT,
+    registered TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+"""
+
+
+def default_runs_root():
+    home = os.environ.get('HOME')
+    if home and os.path.isdir(os.path.join(home, 'simulation_runs')):
+        return os.path.join(home, 'simulation_runs')
+    return os.path.join(os.getcwd(), 'outputs')
+
+
+def connect(root):
+    conn = sqlite3.connect(os.path.join(root, CATALOG_NAME))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_run_dir_name(name):
+    """Return (mode, started ISO timestamp) for a versioned run folder name, or None."""
+    m = RUN_DIR_RE.match(name)
+    if not m:
+        return None
+    date, clock = m.group(2).split('T')
+    return (m.group(1) or 'run', f"{date}T{clock.replace('-', ':')}")
+
+
+def write_series(run_dir, pop_stats):
+    """Store [(step, dolphins, humans), ...] as a compressed columnar file in the run folder."""
+    arr = np.asarray(pop_stats, dtype=np.int32).reshape(-1, 3)
+    path = os.path.join(run_dir, SERIES_NAME)
+    np.savez_compressed(path, step=arr[:, 0], dolphins=arr[:, 1], humans=arr[:, 2])
+    return path
+
+
+def load_series(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in ('step', 'dolphins', 'humans')}
+
+
+def _upsert(conn, row):
+    row = dict(row, registered=datetime.now().isoformat())
+    conn.execute(f"INSERT OR REPLACE INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                 [row.get(col) for col in COLUMNS])
+
+
+def register_run(run_dir, source, params, seed, final_dolphins, final_humans, pop_stats, paths, root=None):
+    """
+    Record a finished run in the catalog of root (default: the parent folder of run_dir,
+    i.e. the runs root setup_output_paths created it in) and write its population series
+    next to it. Returns the series path.
+    """
+    run_dir = os.path.abspath(run_dir)
+    run_id = os.path.basename(run_dir)
+    parsed = parse_run_dir_name(run_id) or (None, None)
+    series_path = write_series(run_dir, pop_stats)
+    conn = connect(root or os.path.dirname(run_dir))
+    try:
+        _upsert(conn, {
+            'run_id': run_id, 'run_dir': run_dir, 'mode': parsed[0], 'started': parsed[1], 'source': source,
+            'grid_size': params.get('grid_size'), 'steps': params.get('steps'), 'seed': seed,
+            'params': json.dumps(params, sort_keys=True),
+            'final_dolphins': final_dolphins, 'final_humans': final_humans,
+            'summary_path': paths.get('summary'), 'population_path': paths.get('population'),
+            'series_path': series_path,
+        })
+        conn.commit()
+    finally:
+        conn.close()
+    return series_path
+
+
+def _read_population_txt(path):
+    rows = []
+    with open(path) as f:
+        for line in f:
+            parts = [p.strip() for p in line.split(',')]
+            if len(parts) == 3 and all(p.lstrip('-').isdigit() for p in parts):
+                rows.append(tuple(int(p) for p in parts))
+    return rows
+
+
+def _ingest_dir(run_dir):
+    """Build a catalog row from the files of a run folder that never registered itself."""
+    run_id = os.path.basename(run_dir)
+    mode, started = parse_run_dir_name(run_id)
+    row = {'run_id': run_id, 'run_dir': run_dir, 'mode': mode, 'started': started, 'source': None, 'params': '{}'}
+    names = set(os.listdir(run_dir))
+    summary = next((n for n in sorted(names) if n.endswith('_summary.txt')), None)
+    population = next((n for n in sorted(names) if n.endswith('_population.txt')), None)
+    if summary:
+        row['summary_path'] = os.path.join(run_dir, summary)
+        row['source'] = summary[:-len('_summary.txt')]
+        with open(row['summary_path']) as f:
+            text = f.read()
+        for key, pattern in (('final_dolphins', r'Final dolphins:\s*(\d+)'), ('final_humans', r'Final humans:\s*(\d+)'),
+                             ('seed', r'seed:\s*(\d+)'), ('grid_size', r'Grid (\d+)x\d+'), ('steps', r'Step=(\d+)')):
+            m = re.search(pattern, text)
+            if m:
+                row[key] = int(m.group(1))
+    if population:
+        row['population_path'] = os.path.join(run_dir, population)
+        pop_stats = _read_population_txt(row['population_path'])
+        if pop_stats:
+            row['series_path'] = write_series(run_dir, pop_stats)
+            row.setdefault('final_dolphins', pop_stats[-1][1])
+            row.setdefault('final_humans', pop_stats[-1][2])
+            row.setdefault('steps', pop_stats[-1][0])
+    elif SERIES_NAME in names:
+        row['series_path'] = os.path.join(run_dir, SERIES_NAME)
+    return row
+
+
+def scan(root, conn=None):
+    """
+    Index run folders under root that are not in the catalog yet, and re-read folders that
+    were indexed while incomplete (no summary or final counts yet: a run still in progress or
+    one that crashed). Returns the number of folders (re-)indexed.
+    """
+    own = conn is None
+    if own:
+        conn = connect(root)
+    try:
+        # Rows from register_run (params recorded) are final; scanned rows only once they have a summary and counts
+        known = {r[0] for r in conn.execute(
+            "SELECT run_id FROM runs WHERE params != '{}' "
+            "OR (summary_path IS NOT NULL AND final_dolphins IS NOT NULL AND final_humans IS NOT NULL)")}
+        added = 0
+        for entry in sorted(os.scandir(root), key=lambda e: e.name):
+            if entry.name in known or not entry.is_dir() or parse_run_dir_name(entry.name) is None:
+                continue
+            try:
+                _upsert(conn, _ingest_dir(entry.path))
+                added += 1
+            except (OSError, ValueError) as e:
+                print(f"WARNING: could not index {entry.path}: {e}", file=sys.stderr)
+        # One transaction per scan, not per folder
+        conn.commit()
+        return added
+    finally:
+        if own:
+            conn.close()
+
+
+def query(conn, where=None, columns=None, group_by=None, aggs=None, order_by=None, limit=None):
+    """
+    Run a filter/aggregate query on the runs table. where/order_by are SQL expressions
+    (e.g. "grid_size >= 100 AND json_extract(params, '$.density') > 0.5").
+    """
+    if group_by:
+        select = list(group_by) + list(aggs or ['count(*)'])
+    else:
+        select = list(aggs) if aggs else list(columns or ('run_id', 'started', 'source', 'seed', 'final_dolphins', 'final_humans'))
+    sql = f"SELECT {', '.join(select)} FROM runs"
+    if where:
+        sql += f" WHERE {where}"
+    if group_by:
+        sql += f" GROUP BY {', '.join(group_by)}"
+    sql += f" ORDER BY {order_by or (', '.join(group_by) if group_by else 'started')}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    cur = conn.execute(sql)
+    return [d[0] for d in cur.description], cur.fetchall()
+
+
+def print_table(header, rows):
+    cells = [[str(h) for h in header]] + [['' if v is None else (f"{v:.4g}" if isinstance(v, float) else str(v)) for v in row] for row in rows]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(header))]
+    for i, r in enumerate(cells):
+        print('  '.join(v.ljust(w) for v, w in zip(r, widths)))
+        if i == 0:
+            print('  '.join('-' * w for w in widths))
+    print(f"({len(rows)} rows)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Indexed catalog of simulation run folders (SQLite).')
+    parser.add_argument('--root', type=str, default=None, help='Runs root holding the <timestamp>_<uuid> folders (default: $HOME/simulation_runs or ./outputs)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('scan', help='Index run folders not yet (completely) in the catalog')
+    q = sub.add_parser('query', help='Filter and aggregate indexed runs (new folders are indexed first)')
+    q.add_argument('--where', type=str, default=None, help='SQL filter, e.g. "final_humans = 0 AND grid_size = 50"')
+    q.add_argument('--columns', type=str, nargs='+', default=None, help='Columns to show: ' + ', '.join(COLUMNS))
+    q.add_argument('--group-by', type=str, nargs='+', default=None, help='Columns to group by')
+    q.add_argument('--agg', type=str, action='append', default=None, help='Aggregate expression, repeatable (e.g. "avg(final_humans)")')
+    q.add_argument('--order-by', type=str, default=None, help='SQL ORDER BY expression')
+    q.add_argument('--limit', type=int, default=None, help='Maximum rows')
+    q.add_argument('--no-scan', action='store_true', help='Query the index as is, without looking for new run folders')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = os.path.abspath(args.root or default_runs_root())
+    if not os.path.isdir(root):
+        print(f"ERROR: runs root {root} does not exist", file=sys.stderr)
+        sys.exit(1)
+    conn = connect(root)
+    try:
+        if args.command == 'scan' or not args.no_scan:
+            added = scan(root, conn)
+            if args.command == 'scan':
+                print(f"Indexed {added} new or updated run(s) in {os.path.join(root, CATALOG_NAME)}")
+                return
+        try:
+            header, rows = query(conn, args.where, args.columns, args.group_by, args.agg, args.order_by, args.limit)
+        except sqlite3.Error as e:
+            print(f"ERROR: invalid query: {e}", file=sys.stderr)
+            sys.exit(1)
+        print_table(header, rows)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Tests for the Ollama session handling of main.py (warm-up, context reuse per context_id,
+LRU eviction, reset), run against a stub Ollama server instead of a real model.
+
+Run with: python3 -m pytest test_main_sessions.py
+"""
+
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class StubOllama:
+    """
+    Minimal /api/generate: records every JSON payload and answers with the received
+    context plus one token per call, so each turn's context identifies the turns before it.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        # Cleared to keep warm-up calls (no prompt) hanging, e.g. to test shutdown
+        self.release_warm_up = threading.Event()
+        self.release_warm_up.set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub.lock:
+                    stub.calls.append(payload)
+                    token = len(stub.calls)
+                if 'prompt' not in payload:
+                    stub.release_warm_up.wait(timeout=10)
+                    body = {'done': True}
+                else:
+                    # Slow enough that concurrent turns would overlap
+                    time.sleep(0.05)
+                    body = {'response': f"echo: {payload['prompt']}", 'context': payload.get('context', []) + [token]}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/generate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def prompts(self):
+        with self.lock:
+            return [c for c in self.calls if 'prompt' in c]
+
+    def close(self):
+        self.release_warm_up.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = StubOllama()
+    monkeypatch.setattr(main, 'OLLAMA_URL', server.url)
+    monkeypatch.setattr(main, 'OLLAMA_WARMUP', False)
+    main.sessions.clear()
+    yield server
+    main.sessions.clear()
+    server.close()
+
+
+def ask(client, prompt=None, **extra):
+    resp = client.post('/a2a', json=dict(extra, prompt=prompt) if prompt else extra)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_warm_up_loads_model_without_prompt(stub, monkeypatch):
+    monkeypatch.setattr(main, 'OLLAMA_WARMUP', True)
+    with TestClient(main.app):
+        deadline = time.monotonic() + 5
+        while not stub.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert stub.calls == [{'model': main.OLLAMA_MODEL, 'keep_alive': main.OLLAMA_KEEP_ALIVE}]
+
+
+def test_shutdown_cancels_pending_warm_up(stub, monkeypatch):
+    monkeypatch.setattr(main, 'OLLAMA_WARMUP', True)
+    stub.release_warm_up.clear()
+    started = time.monotonic()
+    with TestClient(main.app):
+        deadline = time.monotonic() + 5
+        while not stub.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert main.app.state.warm_up.cancelled()
+    assert time.monotonic() - started < 5
+
+
+def test_context_round_trip(stub):
+    with TestClient(main.app) as client:
+        first = ask(client, 'hello', context_id='c1')
+        second = ask(client, 'and again', context_id='c1')
+        ask(client, 'no session')
+    assert first == {'text': 'echo: hello', 'context_id': 'c1'}
+    assert second['text'] == 'echo: and again'
+    calls = stub.prompts()
+    assert 'context' not in calls[0]
+    # The second turn continues from the context Ollama returned for the first one
+    assert calls[1]['context'] == [1]
+    assert 'context' not in calls[2]
+    assert main.sessions['c1'] == [1, 2]
+    assert all(c['stream'] is False and c['keep_alive'] == main.OLLAMA_KEEP_ALIVE for c in calls)
+
+
+def test_lru_eviction(stub, monkeypatch):
+    monkeypatch.setattr(main, 'SESSION_MAX', 2)
+    with TestClient(main.app) as client:
+        ask(client, 'a1', context_id='a')
+        ask(client, 'b1', context_id='b')
+        ask(client, 'a2', context_id='a')  # a is now the most recently used
+        ask(client, 'c1', context_id='c')  # evicts b
+        ask(client, 'b2', context_id='b')
+    assert list(main.sessions) == ['c', 'b']
+    assert 'context' not in stub.prompts()[-1]
+
+
+def test_reset(stub):
+    with TestClient(main.app) as client:
+        ask(client, 'hello', context_id='r')
+        assert ask(client, context_id='r', reset=True) == {'text': '', 'context_id': 'r', 'reset': True}
+        assert 'r' not in main.sessions
+        ask(client, 'fresh start', context_id='r')
+        ask(client, 'reset with prompt', context_id='r', reset=True)
+    calls = stub.prompts()
+    assert 'context' not in calls[1]
+    assert 'context' not in calls[2]
+    assert main.sessions['r'] == [3]
+
+
+def test_batch_items_of_one_conversation_run_in_order(stub):
+    prompts = [
+        {'id': 'first', 'prompt': 'turn 1', 'context_id': 's'},
+        {'id': 'other', 'prompt': 'unrelated'},
+        {'id': 'second', 'prompt': 'turn 2', 'context_id': 's'},
+        {'id': 'third', 'prompt': 'turn 3', 'context_id': 's'},
+    ]
+    with TestClient(main.app) as client:
+        resp = client.post('/a2a/batch', json={'prompts': prompts, 'concurrency': 4})
+    results = {r['id']: r for r in map(json.loads, resp.text.splitlines())}
+    assert set(results) == {'first', 'other', 'second', 'third'}
+    assert all('error' not in r for r in results.values())
+    turns = {c['prompt']: c for c in stub.prompts()}
+    # Each turn continues from the context returned for the one before it, nothing is lost
+    assert 'context' not in turns['turn 1']
+    assert turns['turn 2']['context'] == main.sessions['s'][:-2]
+    assert turns['turn 3']['context'] == main.sessions['s'][:-1]
+    assert len(main.sessions['s']) == 3
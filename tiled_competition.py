@@ -0,0 +1,340 @@
+"""
+Tiled Human-Dolphin Competition Engine
+
+Runs the human/dolphin model from human_dolphin_competition_cluster50x50.py on very large
+worlds (e.g. 10,000x10,000) across several processes. The reproduction and illness rules are
+imported from that script unchanged (reproduce_pairs / illness_step); only the scheduling differs.
+
+**Layout:**
+- The world grid lives in a single np.memmap file (int8, EMPTY/DOLPHIN/HUMAN) inside the run's
+  output directory. Every worker maps the same file, so no grid data is copied between processes.
+- The grid is split into TILE_SIZE x TILE_SIZE tiles. Worker processes own tiles dealt out
+  round-robin within each colour (see below) and keep the pairs of their tiles in memory for
+  the whole run, as (N, 4) int32 arrays [r, c, r2, c2].
+- A pair belongs to the tile containing its first cell.
+
+**Memory:**
+- The grid itself is small (1 byte per cell: 100 MB at 10,000x10,000); the pairs dominate.
+  At rest they cost 16 B per pair (~0.8 GB for a fully occupied 10,000x10,000 world, split
+  across the workers), and pairs crossing tile edges travel through the pipes as arrays too.
+- While a tile runs its phase, its pairs are expanded into the Python lists the shared rules
+  work on, roughly 300 B per pair. Peak memory per worker is therefore about
+  300 B x (pairs in its largest tile); at full occupancy a 1000x1000 tile holds ~500k pairs,
+  i.e. ~150 MB. Lower --tile-size if workers run short of memory.
+
+**Halo and step barrier:**
+- A pair may touch cells up to HALO=3 cells outside its tile (second pair cell 1, birth cell 2,
+  partner cell 3). Tiles are coloured in a 2x2 checkerboard; each step runs the four colours one
+  after another and only tiles of one colour are active at a time. Same-coloured tiles are a full
+  tile apart, so with TILE_SIZE > 2*HALO their halos never overlap and births across tile edges
+  are written straight into the neighbour's cells without locking.
+- Pairs born across an edge stay with the tile that produced them until the end of the step
+  (they can fall ill, but do not reproduce, exactly like the 50x50 script) and are then handed to
+  the owning tile. The coordinator waits for every worker after each colour and after the
+  hand-over: that is the global step barrier.
+- Illness draws from a per-tile RNG seeded by (seed, step, tile_id). Together with the fixed
+  colour order this makes a run reproducible for a given seed regardless of the worker count.
+
+Outputs follow the per-run versioning policy of grid_competition.py (see setup_output_paths).
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+
+import numpy as np
+
+from grid_competition import setup_output_paths
+from run_catalog import register_run
+from human_dolphin_competition_cluster50x50 import (
+    EMPTY, DOLPHIN, HUMAN, PAIR_SIZE, GRID_SIZE, DOLPHIN_SAFE, HUMAN_PAIRS,
+    ILLNESS_RATE_DOLPHIN, ILLNESS_RATE_HUMAN,
+    reproduce_pairs, illness_step,
+)
+
+WORLD_SIZE = 10000
+TILE_SIZE = 1000
+HALO = 3
+TIMESTEPS = 151
+HUMAN_INTRO_STEP = 15
+# Densities of the 50x50 scenario, scaled to the world size
+DOLPHIN_SAFE_FRACTION = DOLPHIN_SAFE / GRID_SIZE
+HUMAN_PAIR_DENSITY = HUMAN_PAIRS / (GRID_SIZE * GRID_SIZE)
+SPECIES = [('DOLPHIN', DOLPHIN, ILLNESS_RATE_DOLPHIN), ('HUMAN', HUMAN, ILLNESS_RATE_HUMAN)]
+
+
+def tile_layout(world_size, tile_size):
+    """Return a list of (tile_id, colour, r0, r1, c0, c1) covering the world row by row."""
+    if tile_size <= 2 * HALO:
+        raise ValueError(f"tile_size must be > {2 * HALO} so same-coloured tiles never share halo cells")
+    n_tiles = (world_size + tile_size - 1) // tile_size
+    tiles = []
+    for ti in range(n_tiles):
+        for tj in range(n_tiles):
+            r0, c0 = ti * tile_size, tj * tile_size
+            r1, c1 = min(r0 + tile_size, world_size), min(c0 + tile_size, world_size)
+            tiles.append((ti * n_tiles + tj, (ti % 2) * 2 + (tj % 2), r0, r1, c0, c1))
+    return tiles
+
+
+def dolphin_region(world_size):
+    safe = max(2, int(round(world_size * DOLPHIN_SAFE_FRACTION)))
+    start = world_size // 2 - safe // 2
+    return start, start + safe
+
+
+def found_dolphins(grid, r0, r1, c0, c1, world_size):
+    """
+    Fill the part of the central dolphin region inside the tile with horizontal pairs.
+    Pairs start on the region's own column parity (reg0, reg0+2, ...), not at the tile edge,
+    so the founded cluster is the same for every tile size; a pair whose first cell is the
+    tile's last column reaches one cell into the neighbouring tile.
+    """
+    reg0, reg1 = dolphin_region(world_size)
+    rr0, rr1 = max(r0, reg0), min(r1, reg1)
+    cc0 = max(c0, reg0)
+    cc0 += (cc0 - reg0) % 2
+    pairs = []
+    for r in range(rr0, rr1):
+        for c in range(cc0, min(c1, reg1 - 1), 2):
+            grid[r, c] = DOLPHIN
+            grid[r, c + 1] = DOLPHIN
+            pairs.append([(r, c), (r, c + 1)])
+    return pairs
+
+
+def introduce_humans(grid, r0, r1, c0, c1, rng):
+    """
+    Drop HUMAN_PAIR_DENSITY pairs per cell at random free positions inside the tile.
+    The 50x50 script's minimum pair distance is not enforced here: at this density the
+    pairs are sparse anyway and random_far_apart_pairs is quadratic in the pair count.
+    """
+    n_pairs = int(round(HUMAN_PAIR_DENSITY * (r1 - r0) * (c1 - c0)))
+    pairs = []
+    attempts = 0
+    while len(pairs) < n_pairs and attempts < 20 * n_pairs:
+        attempts += 1
+        r = int(rng.integers(r0, r1))
+        c = int(rng.integers(c0, c1))
+        if rng.random() < 0.5:
+            nr, nc = r, c + 1
+        else:
+            nr, nc = r + 1, c
+        if nr >= r1 or nc >= c1:
+            continue
+        if grid[r, c] == EMPTY and grid[nr, nc] == EMPTY:
+            grid[r, c] = HUMAN
+            grid[nr, nc] = HUMAN
+            pairs.append([(r, c), (nr, nc)])
+    return pairs
+
+
+def pairs_to_array(pairs):
+    """[[(r,c),(r2,c2)], ...] -> (N, 4) int32 array [r, c, r2, c2]."""
+    return np.asarray(pairs, dtype=np.int32).reshape(-1, 4)
+
+
+def array_to_pairs(arr):
+    """(N, 4) array -> the list-of-cell-tuples form used by reproduce_pairs / illness_step."""
+    return [[(r, c), (r2, c2)] for r, c, r2, c2 in arr.tolist()]
+
+
+def _worker_main(conn, grid_path, world_size, tile_size, tiles, seed):
+    mapped = np.memmap(grid_path, dtype=np.int8, mode='r+', shape=(world_size, world_size))
+    # Plain ndarray view of the same mapping: scalar grid[r, c] in the rules would otherwise go
+    # through np.memmap's Python-level __getitem__ (about 2x slower in reproduce_pairs)
+    grid = np.asarray(mapped)
+    n_tiles = (world_size + tile_size - 1) // tile_size
+    # Pairs are kept as compact (N, 4) int32 arrays between phases (16 B per pair) and only
+    # expanded to Python lists for the tile currently running the shared rules.
+    owned = {t[0]: {'DOLPHIN': pairs_to_array([]), 'HUMAN': pairs_to_array([])} for t in tiles}
+    while True:
+        cmd, arg = conn.recv()
+        if cmd == 'found':
+            for tid, _, r0, r1, c0, c1 in tiles:
+                owned[tid]['DOLPHIN'] = pairs_to_array(found_dolphins(grid, r0, r1, c0, c1, world_size))
+            conn.send(None)
+        elif cmd == 'introduce':
+            step = arg
+            for tid, _, r0, r1, c0, c1 in tiles:
+                rng = np.random.default_rng([seed, step, tid, HUMAN])
+                new = pairs_to_array(introduce_humans(grid, r0, r1, c0, c1, rng))
+                owned[tid]['HUMAN'] = np.concatenate([owned[tid]['HUMAN'], new])
+            conn.send(None)
+        elif cmd == 'step':
+            step, colour = arg
+            births = deaths = 0
+            emigrants = []
+            for tid, tcol, r0, r1, c0, c1 in tiles:
+                if tcol != colour:
+                    continue
+                pairs = {species: array_to_pairs(arr) for species, arr in owned[tid].items()}
+                added = {}
+                for species, code, _ in SPECIES:
+                    added[species] = reproduce_pairs(grid, pairs[species], code, species, step)
+                    births += len(added[species])
+                for species in added:
+                    pairs[species].extend(added[species])
+                rng = np.random.default_rng([seed, step, tid])
+                for species, _, ill_rate in SPECIES:
+                    deaths += illness_step(grid, pairs[species], species, ill_rate, step, rng=rng)
+                # Newborns whose first cell crossed the tile edge move to their owner at the barrier
+                for species in pairs:
+                    arr = pairs_to_array(pairs[species])
+                    inside = (arr[:, 0] >= r0) & (arr[:, 0] < r1) & (arr[:, 1] >= c0) & (arr[:, 1] < c1)
+                    out = arr[~inside]
+                    if len(out):
+                        dest = (out[:, 0] // tile_size) * n_tiles + (out[:, 1] // tile_size)
+                        for d in np.unique(dest):
+                            emigrants.append((int(d), tid, species, out[dest == d]))
+                    owned[tid][species] = arr[inside]
+                del pairs, added
+            conn.send((births, deaths, emigrants))
+        elif cmd == 'adopt':
+            for dest, _, species, arr in arg:
+                owned[dest][species] = np.concatenate([owned[dest][species], arr])
+            n_d = sum(len(p['DOLPHIN']) for p in owned.values()) * PAIR_SIZE
+            n_h = sum(len(p['HUMAN']) for p in owned.values()) * PAIR_SIZE
+            conn.send((n_d, n_h))
+        elif cmd == 'stop':
+            mapped.flush()
+            conn.send(None)
+            conn.close()
+            return
+
+
+class TiledEngine:
+    """Coordinator: starts the workers, drives the colour phases and routes emigrant pairs."""
+
+    def __init__(self, grid_path, world_size=WORLD_SIZE, tile_size=TILE_SIZE, n_workers=None, seed=42):
+        self.world_size = world_size
+        self.tile_size = tile_size
+        self.seed = seed
+        self.tiles = tile_layout(world_size, tile_size)
+        n_workers = n_workers or os.cpu_count() or 1
+        self.n_workers = max(1, min(n_workers, len(self.tiles)))
+        # Deal each colour's tiles out round-robin so every phase keeps all workers busy
+        self.owner = {}
+        for colour in range(4):
+            same = [t[0] for t in self.tiles if t[1] == colour]
+            for i, tid in enumerate(same):
+                self.owner[tid] = i % self.n_workers
+        grid = np.memmap(grid_path, dtype=np.int8, mode='w+', shape=(world_size, world_size))
+        grid[:] = EMPTY
+        grid.flush()
+        del grid
+        self.grid_path = grid_path
+        self.conns = []
+        self.procs = []
+        for w in range(self.n_workers):
+            parent, child = multiprocessing.Pipe()
+            my_tiles = [t for t in self.tiles if self.owner[t[0]] == w]
+            proc = multiprocessing.Process(target=_worker_main,
+                                           args=(child, grid_path, world_size, tile_size, my_tiles, seed),
+                                           daemon=True)
+            proc.start()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def _broadcast(self, cmd, arg=None):
+        """Send a command to every worker and wait for all replies (the barrier)."""
+        for conn in self.conns:
+            conn.send((cmd, arg))
+        return [conn.recv() for conn in self.conns]
+
+    def _hand_over(self, emigrants):
+        per_worker = [[] for _ in range(self.n_workers)]
+        # Sorting by (destination, source tile) keeps adoption order independent of the worker count
+        for rec in sorted(emigrants, key=lambda e: (e[0], e[1])):
+            per_worker[self.owner[rec[0]]].append(rec)
+        for conn, recs in zip(self.conns, per_worker):
+            conn.send(('adopt', recs))
+        counts = [conn.recv() for conn in self.conns]
+        return sum(c[0] for c in counts), sum(c[1] for c in counts)
+
+    def found(self):
+        self._broadcast('found')
+        return self._hand_over([])
+
+    def step(self, step):
+        births = deaths = 0
+        emigrants = []
+        if step == HUMAN_INTRO_STEP:
+            # Humans only land inside their own tile, so all tiles can place them at once
+            self._broadcast('introduce', step)
+        for colour in range(4):
+            for b, d, em in self._broadcast('step', (step, colour)):
+                births += b
+                deaths += d
+                emigrants.extend(em)
+        n_d, n_h = self._hand_over(emigrants)
+        return n_d, n_h, births, deaths
+
+    def close(self):
+        self._broadcast('stop')
+        for proc in self.procs:
+            proc.join()
+
+    def snapshot(self):
+        return np.memmap(self.grid_path, dtype=np.int8, mode='r', shape=(self.world_size, self.world_size))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tiled, memory-mapped Human-Dolphin competition for very large worlds. Outputs are written to a uniquely named <timestamp>_<uuid> run folder (see grid_competition.py).")
+    parser.add_argument('--world-size', type=int, default=WORLD_SIZE, help=f'World edge length in cells (default: {WORLD_SIZE})')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE, help=f'Tile edge length in cells, must be > {2*HALO} (default: {TILE_SIZE})')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--steps', type=int, default=TIMESTEPS - 1, help=f'Number of simulation steps (default: {TIMESTEPS - 1})')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output-dir', type=str, default=None, help="Base directory for the per-run versioned output subfolder.")
+    parser.set_defaults(demo=False, test=False)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output_paths = setup_output_paths(args)
+    output_paths['grid'] = os.path.join(output_paths['base_output_dir'], 'tiled_grid.int8.mmap')
+    log_lines = []
+    t0 = time.perf_counter()
+    try:
+        engine = TiledEngine(output_paths['grid'], args.world_size, args.tile_size, args.workers, args.seed)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    pop_stats = [(0,) + engine.found()]
+    log_lines.append(f"{datetime.now().isoformat()} | Step 0: {pop_stats[0][1]} dolphins founded, {len(engine.tiles)} tiles on {engine.n_workers} workers.")
+    for step in range(1, args.steps + 1):
+        n_d, n_h, births, deaths = engine.step(step)
+        pop_stats.append((step, n_d, n_h))
+        log_lines.append(f"{datetime.now().isoformat()} | Step {step}: {n_d} dolphins, {n_h} humans. Births: {births}. Deaths: {deaths}")
+    engine.close()
+    elapsed = time.perf_counter() - t0
+    with open(output_paths['population'], 'w') as f:
+        f.write('step, dolphins, humans\n')
+        for step, n_d, n_h in pop_stats:
+            f.write(f"{step}, {n_d}, {n_h}\n")
+    with open(output_paths['log'], 'w') as f:
+        for l in log_lines:
+            f.write(l + '\n')
+    final_d, final_h = pop_stats[-1][1], pop_stats[-1][2]
+    summary = [
+        f"Tiled simulation completed. Step={args.steps}, Grid {args.world_size}x{args.world_size}",
+        f"Tiles: {len(engine.tiles)} of {args.tile_size}x{args.tile_size}, workers: {engine.n_workers}, seed: {args.seed}",
+        f"Final dolphins: {final_d}\nFinal humans: {final_h}",
+        f"Outcome: {'Humans survived' if final_h>0 else 'Humans eliminated'}, {'Dolphins survived' if final_d>0 else 'Dolphins eliminated'}",
+        f"Wall time: {elapsed:.1f}s",
+    ]
+    with open(output_paths['summary'], 'w') as f:
+        for line in summary:
+            f.write(line + '\n')
+    params = {'grid_size': args.world_size, 'steps': args.steps, 'tile_size': args.tile_size, 'workers': engine.n_workers}
+    register_run(output_paths['base_output_dir'], 'tiled_competition', params, args.seed, final_d, final_h, pop_stats, output_paths)
+    print(f"All outputs for this run: {output_paths['base_output_dir']}")
+
+
+if __name__ == '__main__':
+    main()